@@ -1,6 +1,13 @@
+from operator import le, gt, eq
+
 from Classification.Instance.Instance import Instance
 from Classification.Attribute.Attribute import Attribute
 
+# Operators are stored as integer codes indexing these tables.
+LESS_EQUAL, GREATER, EQUAL = 0, 1, 2
+OPERATOR_SYMBOLS = ("<=", ">", "==")
+_OP = (le, gt, eq)
+
 class Condition:
     """
     Represents a single condition in a rule (e.g., Age > 18).
@@ -9,8 +16,15 @@ class Condition:
     # Use __slots__ to save memory because we create many conditions.
     __slots__ = ['attribute_index', 'operator', 'value']
 
-    def __init__(self, attribute_index: int, operator: str, value):
+    def __init__(self, attribute_index: int, operator, value):
+        """
+        :param operator: Operator code (LESS_EQUAL, GREATER, EQUAL) or its symbol ("<=", ">", "==").
+        """
         self.attribute_index = attribute_index
+        if isinstance(operator, str):
+            if operator not in OPERATOR_SYMBOLS:
+                raise ValueError(f"Unknown operator: {operator}")
+            operator = OPERATOR_SYMBOLS.index(operator)
         self.operator = operator
         self.value = value
 
@@ -22,18 +36,18 @@ class Condition:
         attribute_obj: Attribute = instance.getAttribute(self.attribute_index)
         val = attribute_obj.getValue()
 
-        # Compare based on the operator
-        if self.operator == "<=":
-            return val <= self.value
-        elif self.operator == ">":
-            return val > self.value
-        elif self.operator == "==":
-            return val == self.value
-        else:
-            return False
+        # Compare based on the operator code
+        return _OP[self.operator](val, self.value)
+
+    def satisfies_mask(self, column):
+        """
+        Vectorized version of satisfies: returns a boolean mask marking which values of the given
+        attribute column meet this condition.
+        """
+        return _OP[self.operator](column, self.value)
 
     def __str__(self):
-        return f"Att-{self.attribute_index} {self.operator} {self.value}"
+        return f"Att-{self.attribute_index} {OPERATOR_SYMBOLS[self.operator]} {self.value}"
 
     def __repr__(self):
         return self.__str__()
\ No newline at end of file
@@ -1,12 +1,109 @@
+import io
 import math
+import os
+import pickle
 import random
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
 
 from Classification.Attribute.ContinuousAttribute import ContinuousAttribute
 from Classification.Attribute.DiscreteAttribute import DiscreteAttribute
 from Classification.Model.Model import Model
 from Classification.Parameter.IREPParameter import IREPParameter
-from .Rule import Rule
-from .Condition import Condition
+from Classification.Performance.ConfusionMatrix import ConfusionMatrix
+from Classification.Performance.DetailedClassificationPerformance import DetailedClassificationPerformance
+from .Rule import Rule, pack_bits, popcount
+from .Condition import Condition, LESS_EQUAL, GREATER, EQUAL
+
+# First bytes of a model file written in the older text format
+_TEXT_MODEL_HEADER = b"DefaultClass:"
+# A single condition of a text model rule, e.g. "Att-2 <= 4.5"
+_CONDITION_PATTERN = re.compile(r"Att-(\d+) (<=|>|==) (\S+)")
+
+# Numba is optional: without it the threshold search falls back to the NumPy implementation.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _threshold_sweep(totals, positives, pos_before, neg_before, min_coverage, floor):
+    """
+    Finds the best "<=" / ">" split of a continuous attribute in a single pass over its sorted distinct
+    values, given the number of instances (totals) and positive instances (positives) having each value.
+    Candidates whose gain upper bound pos_after * info_before is below floor are skipped without
+    computing their logarithm, and so are candidates with the same positive count as a valid neighbouring
+    candidate that covers fewer negatives (see IREPModel._best_threshold).
+    Returns (best_index, best_op_code, best_gain); best_op_code is -1 if no split is valid.
+    Written with plain loops over integer arrays so that it can be compiled by Numba.
+    """
+    best_index = -1
+    best_op = -1
+    best_gain = -np.inf
+    if pos_before == 0:
+        return best_index, best_op, best_gain
+    info_before = -math.log2(pos_before / (pos_before + neg_before + 1e-9))
+    # Values that do not occur in the current instances are not candidates
+    present = np.nonzero(totals)[0]
+    pos_le = 0
+    total_le = 0
+    for j in range(len(present)):
+        k = present[j]
+        previous_pos_le, previous_total_le = pos_le, total_le
+        pos_le += positives[k]
+        total_le += totals[k]
+        neg_le = total_le - pos_le
+        for op in (LESS_EQUAL, GREATER):
+            if op == LESS_EQUAL:
+                # Adds only negatives to the previous "<=" candidate
+                if positives[k] == 0 and previous_pos_le > 0 and previous_total_le >= min_coverage:
+                    continue
+                pos_after, neg_after = pos_le, neg_le
+            else:
+                pos_after, neg_after = pos_before - pos_le, neg_before - neg_le
+                # Covers only negatives more than the next ">" candidate
+                if j + 1 < len(present) and positives[present[j + 1]] == 0 and pos_after > 0 \
+                        and pos_after + neg_after - totals[present[j + 1]] >= min_coverage:
+                    continue
+            if pos_after + neg_after < min_coverage or pos_after == 0 or pos_after * info_before < floor:
+                continue
+            info_after = -math.log2(pos_after / (pos_after + neg_after + 1e-9))
+            gain = pos_after * (info_before - info_after)
+            if gain > best_gain:
+                best_index, best_op, best_gain = k, op, gain
+    return best_index, best_op, best_gain
+
+
+# nogil lets the compiled sweep run concurrently in the attribute search threads
+_best_threshold_gain = njit(cache=True, nogil=True)(_threshold_sweep) if njit is not None else None
+_numba_warning_shown = False
+
+# Attributes are searched in parallel threads only when the growing set is large enough
+# (instances times attributes) to pay for the task overhead.
+_PARALLEL_MIN_CELLS = 1 << 16
+_attribute_executor = None
+
+
+def _get_attribute_executor():
+    """ Returns the module-level thread pool used by the attribute search, creating it on first use. """
+    global _attribute_executor
+    if _attribute_executor is None:
+        _attribute_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+    return _attribute_executor
+
+
+def _reset_attribute_executor():
+    """ Drops the thread pool inherited by a forked process, which has none of the parent's threads. """
+    global _attribute_executor
+    _attribute_executor = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_attribute_executor)
+
 
 class IREPModel(Model):
     """
@@ -25,17 +122,19 @@ class IREPModel(Model):
         """
         # 1. Handle Parameters
         min_coverage = 1
+        parallel_classes = False
         if parameters is None:
             pruning_ratio = 0.66
         else:
             pruning_ratio = parameters.getPruningRatio()
             min_coverage = parameters.getMinCoverage()
+            parallel_classes = parameters.getParallelClasses()
             if parameters.seed is not None:
                 random.seed(parameters.seed)
 
         # 2. Sort Classes by Frequency
         # We learn rare classes first to handle imbalanced datasets better.
-        instances = trainSet.getInstances()[:] 
+        instances = trainSet.getInstances()
         
         counts = {}
         for inst in instances:
@@ -51,44 +150,84 @@ class IREPModel(Model):
                 self.default_class = classes[0]
             return
 
-        random.shuffle(instances)
         self.rules = []
 
+        # Read labels and attribute values once; the helpers below work on index arrays
+        # into these instead of re-reading the Instance objects.
+        X, labels, is_continuous = self._materialize(instances)
+        encoded = self._encode(X, is_continuous)
+        # The instances are shuffled through a permutation of their indexes instead of a copy of the list
+        permutation = list(range(len(instances)))
+        random.shuffle(permutation)
+        active_idx = np.array(permutation, dtype=np.intp)
+
         # 3. Multiclass Training Loop (One-vs-Rest)
         # Iterate through classes, treating the current one as Positive and others as Negative.
-        for i in range(len(classes) - 1):
-            pos_class = classes[i]
-            
-            while self.has_positive_instances(instances, pos_class):
-                # Split data into growing and pruning sets
-                split_idx = int(len(instances) * pruning_ratio)
-                grow_set = instances[:split_idx]
-                prune_set = instances[split_idx:]
-                
-                if len(prune_set) == 0: 
-                    prune_set = grow_set
-
-                # Grow a rule using the growing set
-                rule = self.grow_rule(grow_set, trainSet, pos_class, min_coverage)
-                
-                # Prune the rule using the pruning set
-                self.prune_rule(rule, prune_set, pos_class)
-
-                # Check stopping criteria
-                rule_acc = self.calculate_pruning_metric(rule, prune_set, pos_class)
-                empty_acc = self.calculate_empty_clause_metric(prune_set, pos_class)
-
-                if rule.get_length() == 0 or rule_acc <= empty_acc:
-                    break
-                
-                self.rules.append(rule)
-                
-                # Remove instances covered by the new rule
-                instances = [inst for inst in instances if not rule.covers(inst)]
+        if parallel_classes and len(classes) > 2:
+            # Every class learns from the same snapshot, so the classes are independent and
+            # can be trained in separate processes. Rules are merged in rare-first order.
+            workers = min(os.cpu_count() or 1, len(classes) - 1)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self.learn_rules_for_class, X, labels, active_idx, pos_class,
+                                           is_continuous, pruning_ratio, min_coverage, encoded)
+                           for pos_class in classes[:-1]]
+                for future in futures:
+                    self.rules.extend(future.result()[0])
+        else:
+            for pos_class in classes[:-1]:
+                rules, active_idx = self.learn_rules_for_class(X, labels, active_idx, pos_class,
+                                                               is_continuous, pruning_ratio, min_coverage,
+                                                               encoded)
+                self.rules.extend(rules)
         
         # The last remaining class becomes the default class
         self.default_class = classes[-1]
 
+    def learn_rules_for_class(self, X, labels, active_idx, pos_class, is_continuous, pruning_ratio, min_coverage=1,
+                              encoded=None):
+        """
+        Learns the rules of one positive class on the instances X[active_idx]. encoded is the result of
+        _encode(X, is_continuous) and is computed here if not given.
+        Returns the learned rules and the indexes of the instances none of them covers.
+        """
+        if encoded is None:
+            encoded = self._encode(X, is_continuous)
+        rules = []
+        # Positive-class mask of all training instances, computed once per class
+        y_pos = labels == pos_class
+        while self.has_positive_instances(y_pos, active_idx):
+            # Split data into growing and pruning sets
+            split_idx = int(len(active_idx) * pruning_ratio)
+            grow_idx = active_idx[:split_idx]
+            prune_idx = active_idx[split_idx:]
+
+            if len(prune_idx) == 0:
+                prune_idx = grow_idx
+
+            # Grow a rule using the growing set
+            rule = self.grow_rule(encoded, y_pos, grow_idx, pos_class, is_continuous, min_coverage)
+
+            # Prune the rule using the pruning set
+            self.prune_rule(rule, X, y_pos, prune_idx)
+
+            # The coverage of the active instances is computed once and used both for the
+            # stopping criteria (on its pruning part) and for removing the covered instances.
+            covered = rule.covers_mask(X, active_idx)
+            prune_covered = covered[split_idx:] if len(prune_idx) < len(active_idx) else covered
+
+            # Check stopping criteria
+            rule_acc = self.calculate_pruning_metric(rule, X, y_pos, prune_idx, prune_covered)
+            empty_acc = self.calculate_empty_clause_metric(y_pos, prune_idx)
+
+            if rule.get_length() == 0 or rule_acc <= empty_acc:
+                break
+
+            rules.append(rule)
+
+            # Remove instances covered by the new rule
+            active_idx = active_idx[~covered]
+        return rules, active_idx
+
     def predict(self, instance):
         """ Predicts the class label for a new instance. """
         for rule in self.rules:
@@ -96,179 +235,382 @@ class IREPModel(Model):
                 return rule.class_label
         return self.default_class
 
+    def predict_batch(self, X):
+        """
+        Predicts the class labels of all rows of an attribute matrix X (as built by _materialize).
+        The rules are applied in order as vectorized masks; each row gets the label of the first rule
+        covering it, or the default class.
+        """
+        predictions = np.full(X.shape[0], self.default_class, dtype=object)
+        covered_any = np.zeros(X.shape[0], dtype=bool)
+        for rule in self.rules:
+            mask = rule.covers_mask(X) & ~covered_any
+            predictions[mask] = rule.class_label
+            covered_any |= mask
+        return predictions
+
+    def test(self, testSet):
+        """
+        Tests the model on an instance list, predicting the whole list at once with predict_batch.
+        """
+        if testSet.size() == 0:
+            return super().test(testSet)
+        X, labels, _ = self._materialize(testSet.getInstances())
+        confusion = ConfusionMatrix(testSet.getUnionOfPossibleClassLabels())
+        for actual, predicted in zip(labels.tolist(), self.predict_batch(X)):
+            confusion.classify(actual, predicted)
+        return DetailedClassificationPerformance(confusion)
+
     def saveModel(self, fileName):
-        """ Saves the model rules to a file. """
+        """
+        Saves the model to a binary file. Every rule is stored as its packed condition arrays,
+        so class labels and values are written as they are instead of being formatted as text.
+        The file is a pickle, so it should only be shared with parties trusted to load it.
+        """
         try:
-            with open(fileName, "w", encoding="utf-8") as file:
-                file.write(f"DefaultClass:{self.default_class}\n")
-                for rule in self.rules:
-                    file.write(str(rule) + "\n")
+            with open(fileName, "wb") as file:
+                pickle.dump({"default": self.default_class,
+                             "rules": [rule.to_record() for rule in self.rules]}, file, protocol=5)
         except Exception as e:
             print(f"Error saving model: {e}")
 
     def loadModel(self, fileName):
-        """ Loads the model rules from a file. """
+        """
+        Loads the model rules from a binary file, or from a text file in the older rule format.
+        Binary files are unpickled, which can execute arbitrary code: never load a model file
+        from an untrusted source.
+        """
         self.rules = []
         try:
-            with open(fileName, "r", encoding="utf-8") as file:
-                lines = file.readlines()
-                for line in lines:
-                    line = line.strip()
-                    if not line: continue
-                    
-                    if line.startswith("DefaultClass:"):
-                        self.default_class = line.split(":")[1]
-                    elif line.startswith("IF "):
-                        self.parse_and_add_rule(line)
+            with open(fileName, "rb") as file:
+                if file.peek(len(_TEXT_MODEL_HEADER)).startswith(_TEXT_MODEL_HEADER):
+                    self.load_text_model(io.TextIOWrapper(file, encoding="utf-8"))
+                else:
+                    model = pickle.load(file)
+                    self.default_class = model["default"]
+                    self.rules = [Rule.from_record(record) for record in model["rules"]]
         except Exception as e:
+            # A partially read model must not pass for a loaded one
+            self.rules = []
+            self.default_class = None
             print(f"Error loading model: {e}")
 
+    def load_text_model(self, file):
+        """ Loads the rules from a text model file with one "IF ... THEN ..." rule per line. """
+        for line in file:
+            line = line.strip()
+            if not line: continue
+
+            if line.startswith("DefaultClass:"):
+                self.default_class = line.split(":")[1]
+            elif line.startswith("IF "):
+                self.parse_and_add_rule(line)
+
     def parse_and_add_rule(self, line):
-        """ Helper to parse a rule string from the file. """
-        try:
-            parts = line.split(" THEN ")
-            class_label = parts[1]
-            condition_part = parts[0][3:] 
-
-            rule = Rule(class_label)
-            conditions = condition_part.split(" AND ")
-            for cond_str in conditions:
-                terms = cond_str.split(" ")
-                att_index = int(terms[0].split("-")[1])
-                operator = terms[1]
-                value_str = terms[2]
-
-                try:
-                    value = float(value_str)
-                except ValueError:
-                    value = value_str 
-
-                rule.add_condition(Condition(att_index, operator, value))
-            
-            self.rules.append(rule)
-        except:
-            pass
+        """ Helper to parse a rule string from a text model file. """
+        condition_part, separator, class_label = line[3:].partition(" THEN ")
+        if not separator:
+            raise ValueError(f"Malformed rule line: {line}")
+
+        rule = Rule(class_label)
+        for cond_str in condition_part.split(" AND "):
+            if not cond_str: continue
+            match = _CONDITION_PATTERN.fullmatch(cond_str)
+            if match is None:
+                raise ValueError(f"Malformed condition '{cond_str}' in rule line: {line}")
+            att_index, operator, value_str = match.groups()
+
+            try:
+                value = float(value_str)
+            except ValueError:
+                value = value_str
+
+            rule.add_condition(Condition(int(att_index), operator, value))
+
+        self.rules.append(rule)
 
     # --- Helper Methods ---
 
-    def grow_rule(self, instances, trainSet, pos_class, min_coverage=1):
-        """ Grows a rule by adding conditions that maximize Foil Gain. """
+    def grow_rule(self, encoded, y_pos, idx, pos_class, is_continuous, min_coverage=1):
+        """
+        Grows a rule on the instances idx by adding conditions that maximize Foil Gain. encoded is the
+        (value index matrix, sorted distinct values) pair returned by _encode.
+        """
         rule = Rule(pos_class)
-        current_instances = instances[:]
-        
-        if len(instances) > 0:
-            num_attributes = instances[0].attributeSize()
-            sample_instance = instances[0]
-        elif trainSet.size() > 0:
-            num_attributes = trainSet.get(0).attributeSize()
-            sample_instance = trainSet.get(0)
-        else:
-            return rule
+        # Live mask over idx marking the instances that satisfy the rule grown so far
+        current_mask = np.ones(len(idx), dtype=bool)
+        grow_pos = y_pos[idx]
+        # The values missing from the growing set just get a zero count
+        codes_matrix, tables = encoded
+        encoded = [(tables[i], codes_matrix[:, i][idx]) for i in range(len(tables))]
+        num_attributes = len(tables)
+
+        # Best gain of every attribute in the previous step, used to order the search
+        attribute_gains = np.zeros(num_attributes)
 
         while True:
+            current_pos = grow_pos[current_mask]
+            pos_before = int(np.count_nonzero(current_pos))
+            neg_before = len(current_pos) - pos_before
             # Stop if no negative instances are left
-            negatives = [inst for inst in current_instances if inst.getClassLabel() != pos_class]
-            if len(negatives) == 0:
+            if neg_before == 0:
                 break
 
             best_cond = None
             best_gain = -float('inf')
+            current_codes = [None] * num_attributes
 
-            for i in range(num_attributes):
-                attribute_obj = sample_instance.getAttribute(i)
-                possible_values = self.get_distinct_values(current_instances, i)
-                
-                # Handle Continuous Attributes (Numbers)
-                if isinstance(attribute_obj, ContinuousAttribute):
-                    for value in possible_values:
-                        for op in ["<=", ">"]:
-                            cond = Condition(i, op, value)
-                            gain = self.calculate_foil_gain(current_instances, cond, pos_class, min_coverage)
-                            if gain > best_gain:
-                                best_gain = gain
-                                best_cond = cond
-                # Handle Discrete Attributes (Categories)
-                else:
-                    for value in possible_values:
-                        cond = Condition(i, "==", value)
-                        gain = self.calculate_foil_gain(current_instances, cond, pos_class, min_coverage)
-                        if gain > best_gain:
-                            best_gain = gain
-                            best_cond = cond
+            def search(i, floor=-float('inf')):
+                return self._search_attribute(encoded[i], current_mask, current_pos, is_continuous[i],
+                                              pos_before, neg_before, min_coverage, floor)
+
+            # The attributes are independent; the NumPy and Numba kernels release the GIL
+            if num_attributes > 1 and len(current_pos) * num_attributes >= _PARALLEL_MIN_CELLS:
+                results = _get_attribute_executor().map(lambda i: (i, search(i)), range(num_attributes))
+            else:
+                # Attributes that gained most in the previous step are searched first, so that the best
+                # gain found so far lets the later searches skip candidates that cannot reach it.
+                results = ((i, search(i, best_gain)) for i in np.argsort(-attribute_gains, kind="stable"))
+
+            for i, (codes, k, op, gain) in results:
+                i = int(i)
+                current_codes[i] = codes
+                attribute_gains[i] = gain
+                # Ties go to the first attribute, as in a search in attribute order
+                if gain > best_gain or (gain == best_gain and best_cond is not None
+                                        and i < best_cond.attribute_index):
+                    best_gain = gain
+                    best_cond = Condition(i, op, k)
 
             if best_cond is None or best_gain <= 0:
                 break
 
+            # Codes preserve the order of the values, so the winning condition can be applied to the
+            # codes already extracted for this iteration before translating its index back to a value.
+            current_mask[current_mask] = best_cond.satisfies_mask(current_codes[best_cond.attribute_index])
+            best_cond.value = encoded[best_cond.attribute_index][0][best_cond.value]
             rule.add_condition(best_cond)
-            current_instances = [inst for inst in current_instances if best_cond.satisfies(inst)]
-            
+
         return rule
 
-    def prune_rule(self, rule, prune_set, pos_class):
-        """ Prunes the rule to avoid overfitting using the pruning metric. """
-        best_metric = self.calculate_pruning_metric(rule, prune_set, pos_class)
+    def _search_attribute(self, encoded, current_mask, y_pos, is_continuous, pos_before, neg_before,
+                          min_coverage=1, floor=-float('inf')):
+        """
+        Finds the best condition on one attribute of the growing set. encoded holds the sorted distinct
+        values of the attribute and the value index of every instance of the growing set. Candidates
+        that certainly gain less than floor are not evaluated.
+        Returns (value indexes of the current instances, value index, operator code, gain).
+        """
+        values, codes = encoded
+        codes = codes[current_mask]
+        totals = np.bincount(codes, minlength=len(values))
+        positives = np.bincount(codes[y_pos], minlength=len(values))
+        # Handle Continuous Attributes (Numbers)
+        if is_continuous:
+            k, op, gain = self._best_threshold(totals, positives, pos_before, neg_before, min_coverage, floor)
+        # Handle Discrete Attributes (Categories)
+        else:
+            k, op, gain = self._best_category(totals, positives, pos_before, neg_before, min_coverage, floor)
+        return codes, k, op, gain
+
+    def prune_rule(self, rule, X, y_pos, idx):
+        """
+        Prunes the rule to avoid overfitting using the pruning metric on the instances X[idx].
+        The coverage of the rule without condition i is the AND of the prefix of conditions before i
+        and the suffix after i, so every candidate is evaluated without copying the rule. Coverages are
+        packed bitsets (64 instances per uint64 word) and counted with popcount.
+        """
+        is_pos = y_pos[idx]
+        P = np.count_nonzero(is_pos)
+        pos_bits = pack_bits(is_pos)
+        all_bits = pack_bits(np.ones(len(idx), dtype=bool))
+        satisfied = rule.condition_bits(X, idx)
+        full_coverage = np.bitwise_and.reduce(satisfied, axis=0) if rule.get_length() > 0 else all_bits
+        best_metric = self._bits_metric(len(idx), P, pos_bits, full_coverage)
         while rule.get_length() > 0:
-            best_temp_rule = None
-            improved = False
-            for i in range(rule.get_length()):
-                temp_rule = rule.copy()
-                temp_rule.remove_condition(i)
-                metric = self.calculate_pruning_metric(temp_rule, prune_set, pos_class)
+            length = rule.get_length()
+            # Cached on the rule and kept up to date by remove_condition across the rounds
+            satisfied = rule.condition_bits(X, idx)
+            prefix = np.bitwise_and.accumulate(satisfied, axis=0)
+            suffix = np.bitwise_and.accumulate(satisfied[::-1], axis=0)[::-1]
+            best_index = None
+            for i in range(length):
+                if length == 1:
+                    covered = all_bits
+                elif i == 0:
+                    covered = suffix[1]
+                elif i == length - 1:
+                    covered = prefix[i - 1]
+                else:
+                    covered = prefix[i - 1] & suffix[i + 1]
+                metric = self._bits_metric(len(idx), P, pos_bits, covered)
                 if metric > best_metric:
                     best_metric = metric
-                    best_temp_rule = temp_rule
-                    improved = True
-            if improved:
-                rule.conditions = best_temp_rule.conditions
-                best_metric = best_metric
+                    best_index = i
+            if best_index is not None:
+                rule.remove_condition(best_index)
             else:
                 break
+        rule.clear_cache()
+
+    def calculate_pruning_metric(self, rule, X, y_pos, idx, covered=None):
+        """
+        Calculates accuracy metric: (p + (N - n)) / (P + N).
+        covered optionally gives the already computed coverage mask of the rule over X[idx].
+        """
+        if covered is None:
+            covered = rule.covers_mask(X, idx)
+        is_pos = y_pos[idx]
+        return self._coverage_metric(is_pos, np.count_nonzero(is_pos), covered)
 
-    def calculate_pruning_metric(self, rule, instances, pos_class):
-        """ Calculates accuracy metric: (p + (N - n)) / (P + N). """
-        if len(instances) == 0: return 0.0
-        P = sum(1 for inst in instances if inst.getClassLabel() == pos_class)
-        N = len(instances) - P
-        covered = [inst for inst in instances if rule.covers(inst)]
-        p = sum(1 for inst in covered if inst.getClassLabel() == pos_class)
-        n = sum(1 for inst in covered if inst.getClassLabel() != pos_class)
+    def _coverage_metric(self, is_pos, P, covered):
+        """ Pruning metric given the positive-class mask, its number of positives P and the rule's coverage mask. """
+        if len(is_pos) == 0: return 0.0
+        P = int(P)
+        N = len(is_pos) - P
+        p = int(np.count_nonzero(is_pos & covered))
+        n = int(np.count_nonzero(covered)) - p
         return (p + (N - n)) / (P + N)
 
-    def calculate_empty_clause_metric(self, instances, pos_class):
+    def _bits_metric(self, size, P, pos_bits, covered_bits):
+        """ Pruning metric of a rule whose coverage of size instances, P of them positive, is a packed bitset. """
+        if size == 0: return 0.0
+        P = int(P)
+        N = size - P
+        p = popcount(pos_bits & covered_bits)
+        n = popcount(covered_bits) - p
+        return (p + (N - n)) / (P + N)
+
+    def calculate_empty_clause_metric(self, y_pos, idx):
         """ Calculates accuracy if no rule existed. """
-        if len(instances) == 0: return 0.0
-        P = sum(1 for inst in instances if inst.getClassLabel() == pos_class)
-        N = len(instances) - P
+        if len(idx) == 0: return 0.0
+        P = int(np.count_nonzero(y_pos[idx]))
+        N = len(idx) - P
         return N / (P + N)
 
-    def calculate_foil_gain(self, instances, cond, pos_class, min_coverage=1):
-        """ Calculates Foil Gain to select the best condition. """
-        pos_before = sum(1 for inst in instances if inst.getClassLabel() == pos_class)
-        neg_before = len(instances) - pos_before
-        
-        subset = [inst for inst in instances if cond.satisfies(inst)]
-        
+    def calculate_foil_gain(self, pos_before, neg_before, pos_after, neg_after, min_coverage=1,
+                            floor=-float('inf')):
+        """
+        Calculates Foil Gain of candidate conditions from the class counts before and after applying them.
+        pos_after and neg_after are arrays with one entry per candidate; candidates covering fewer than
+        min_coverage instances or no positive instance get -inf. Since info_after is never negative,
+        pos_after * info_before bounds the gain, and candidates whose bound is below floor also get -inf.
+        """
+        pos_after = np.asarray(pos_after)
+        neg_after = np.asarray(neg_after)
+        gains = np.full(pos_after.shape, -np.inf)
+        if pos_before == 0:
+            return gains
+        # info_before is the same for every candidate, so only info_after is computed per candidate
+        info_before = -math.log2(pos_before / (pos_before + neg_before + 1e-9))
         # Check minimum coverage to prevent overfitting
-        if len(subset) < min_coverage:
-            return -float('inf')
-            
-        pos_after = sum(1 for inst in subset if inst.getClassLabel() == pos_class)
-        neg_after = len(subset) - pos_after
+        valid = (pos_after > 0) & (pos_after + neg_after >= min_coverage) & (pos_after * info_before >= floor)
+        if not valid.any():
+            return gains
 
-        if pos_after == 0: return -float('inf')
-        
-        info_before = -math.log2(pos_before / (pos_before + neg_before + 1e-9))
-        info_after = -math.log2(pos_after / (pos_after + neg_after + 1e-9))
-        
-        return pos_after * (info_before - info_after)
+        pos_after = pos_after[valid]
+        info_after = -np.log2(pos_after / (pos_after + neg_after[valid] + 1e-9))
+        gains[valid] = pos_after * (info_before - info_after)
+        return gains
 
-    def has_positive_instances(self, instances, pos_class):
-        for inst in instances:
-            if inst.getClassLabel() == pos_class: return True
-        return False
+    def _best_threshold(self, totals, positives, pos_before, neg_before, min_coverage=1, floor=-float('inf')):
+        """
+        Finds the best "<=" / ">" split of a continuous attribute from the per-value instance and positive
+        counts (indexed by sorted distinct value). Uses the Numba compiled sweep when available; otherwise
+        the counts of every threshold are read from cumulative sums.
+        Returns (value index, operator code, gain).
+        """
+        global _numba_warning_shown
+        if _best_threshold_gain is not None:
+            k, op, gain = _best_threshold_gain(totals, positives, pos_before, neg_before, min_coverage, floor)
+            if op < 0:
+                return None, None, -float('inf')
+            return int(k), int(op), float(gain)
+        if not _numba_warning_shown:
+            warnings.warn("numba is not installed, IREP uses the slower NumPy threshold search.", RuntimeWarning)
+            _numba_warning_shown = True
 
-    def get_distinct_values(self, instances, attribute_index):
-        values = set()
-        for inst in instances:
-            values.add(inst.getAttribute(attribute_index).getValue())
-        return sorted(list(values))
\ No newline at end of file
+        present = totals.nonzero()[0]
+        present_positives = positives[present]
+        pos_le = present_positives.cumsum()
+        neg_le = totals[present].cumsum() - pos_le
+        # Even entries hold the "<=" and odd entries the ">" candidate of every threshold, so the first
+        # maximum of the gains follows the value-then-operator candidate order.
+        pos_after = np.empty(2 * len(present), dtype=np.int64)
+        neg_after = np.empty(2 * len(present), dtype=np.int64)
+        pos_after[0::2] = pos_le
+        pos_after[1::2] = pos_before - pos_le
+        neg_after[0::2] = neg_le
+        neg_after[1::2] = neg_before - neg_le
+        # When a value has no positive instances, the "<=" candidate ending at it has the same positive count
+        # as the previous "<=" candidate and more negatives, and the ">" candidate just below it has the same
+        # positive count as the next ">" candidate and more negatives. Such a candidate gains strictly less
+        # than its neighbour whenever the neighbour is valid, so only the neighbour is evaluated.
+        no_positives = present_positives[1:] == 0
+        covered = pos_after + neg_after
+        candidates = np.ones(2 * len(present), dtype=bool)
+        candidates[2::2] = ~(no_positives & (pos_after[0:-2:2] > 0) & (covered[0:-2:2] >= min_coverage))
+        candidates[1:-1:2] = ~(no_positives & (pos_after[3::2] > 0) & (covered[3::2] >= min_coverage))
+        gains = np.full(2 * len(present), -np.inf)
+        gains[candidates] = self.calculate_foil_gain(pos_before, neg_before, pos_after[candidates],
+                                                     neg_after[candidates], min_coverage, floor)
+        if len(gains) == 0:
+            return None, None, -float('inf')
+        best = int(np.argmax(gains))
+        if gains[best] == -np.inf:
+            return None, None, -float('inf')
+        return int(present[best // 2]), (LESS_EQUAL, GREATER)[best % 2], float(gains[best])
+
+    def _best_category(self, totals, positives, pos_before, neg_before, min_coverage=1, floor=-float('inf')):
+        """
+        Finds the best "==" condition of a discrete attribute from the per-value instance and positive counts.
+        Returns (value index, operator code, gain).
+        """
+        present = totals.nonzero()[0]
+        gains = self.calculate_foil_gain(pos_before, neg_before, positives[present],
+                                         totals[present] - positives[present], min_coverage, floor)
+        if len(gains) == 0:
+            return None, EQUAL, -float('inf')
+        best = int(np.argmax(gains))
+        if gains[best] == -np.inf:
+            return None, EQUAL, -float('inf')
+        return int(present[best]), EQUAL, float(gains[best])
+
+    def _materialize(self, instances):
+        """
+        Converts the instances to a 2-D attribute matrix X, an array of class labels and a boolean
+        vector marking the continuous attributes.
+        """
+        num_attributes = instances[0].attributeSize()
+        is_continuous = np.fromiter((isinstance(instances[0].getAttribute(i), ContinuousAttribute)
+                                     for i in range(num_attributes)), dtype=bool, count=num_attributes)
+        dtype = np.float64 if is_continuous.all() else object
+        X = np.fromiter((inst.getAttribute(i).getValue() for inst in instances for i in range(num_attributes)),
+                        dtype=dtype, count=len(instances) * num_attributes).reshape(len(instances), num_attributes)
+        labels = np.array([inst.getClassLabel() for inst in instances])
+        return X, labels, is_continuous
+
+    def _encode(self, X, is_continuous):
+        """
+        Replaces every attribute value by its index among the sorted distinct values of its attribute.
+        Only the order of the values matters to the rule search, so it runs on these small unsigned
+        integers (uint8, uint16 or uint32 depending on the number of distinct values) and the winning
+        index is translated back to its value.
+        Returns the column-major value index matrix and the list of sorted distinct values of every attribute.
+        """
+        tables = []
+        inverses = []
+        for i in range(X.shape[1]):
+            column = X[:, i].astype(np.float64) if is_continuous[i] else X[:, i]
+            values, inverse = np.unique(column, return_inverse=True)
+            tables.append(values.tolist())
+            inverses.append(inverse.reshape(-1))
+        size = max((len(values) for values in tables), default=0)
+        dtype = np.uint8 if size <= 1 << 8 else np.uint16 if size <= 1 << 16 else np.uint32
+        codes = np.empty(X.shape, dtype=dtype, order="F")
+        for i, inverse in enumerate(inverses):
+            codes[:, i] = inverse
+        return codes, tables
+
+    def has_positive_instances(self, y_pos, idx):
+        return bool(y_pos[idx].any())
@@ -1,46 +1,165 @@
-from .Condition import Condition
+import numpy as np
+
+from .Condition import Condition, EQUAL, _OP
+
+
+def pack_bits(masks):
+    """
+    Packs boolean masks along their last axis into uint64 words holding 64 instances each.
+    The padding bits of the last word are zero.
+    """
+    packed = np.packbits(masks, axis=-1)
+    padding = -packed.shape[-1] % 8
+    if padding:
+        packed = np.pad(packed, [(0, 0)] * (packed.ndim - 1) + [(0, padding)])
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def popcount(words) -> int:
+    """ Number of set bits in an array of packed words. """
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
 
 class Rule:
     """
     Represents a classification rule consisting of multiple conditions.
     Example: IF (Age > 18) AND (Income > 5000) THEN Class = Approved.
+    The conditions are stored as parallel arrays (attribute index, operator code, numeric value
+    and discrete value) so that the whole rule can be evaluated with vectorized comparisons.
     """
-    
+
     # Use __slots__ to optimize memory usage.
-    __slots__ = ['class_label', 'conditions']
+    __slots__ = ['class_label', 'attr_idx', 'op_code', 'value_num', 'value_obj', '_cond_masks_cache']
 
     def __init__(self, class_label):
         self.class_label = class_label
-        self.conditions = []
+        self.attr_idx = np.empty(0, dtype=np.int32)
+        self.op_code = np.empty(0, dtype=np.int8)
+        # Thresholds of the "<=" / ">" conditions; NaN for "==" conditions.
+        self.value_num = np.empty(0, dtype=np.float64)
+        # Values of the "==" conditions; None for "<=" / ">" conditions.
+        self.value_obj = np.empty(0, dtype=object)
+        # condition_bits results keyed by (id(X), id(idx)). The entries also hold X and idx so that
+        # the ids cannot be reused by other arrays while they are cached.
+        self._cond_masks_cache = {}
+
+    @property
+    def conditions(self):
+        """ The conditions of the rule as Condition objects. """
+        return [self.get_condition(j) for j in range(self.get_length())]
+
+    def get_condition(self, index):
+        """ Returns the condition at a specific index as a Condition object. """
+        op = int(self.op_code[index])
+        value = self.value_obj[index] if op == EQUAL else float(self.value_num[index])
+        return Condition(int(self.attr_idx[index]), op, value)
 
     def add_condition(self, condition):
         """ Adds a new condition to the rule. """
-        self.conditions.append(condition)
+        is_equal = condition.operator == EQUAL
+        value_obj = np.empty(1, dtype=object)
+        value_obj[0] = condition.value if is_equal else None
+        self.attr_idx = np.append(self.attr_idx, np.int32(condition.attribute_index))
+        self.op_code = np.append(self.op_code, np.int8(condition.operator))
+        self.value_num = np.append(self.value_num, np.nan if is_equal else float(condition.value))
+        self.value_obj = np.concatenate((self.value_obj, value_obj))
+        self._cond_masks_cache.clear()
 
     def remove_condition(self, index):
         """ Removes a condition at a specific index. """
-        if 0 <= index < len(self.conditions):
-            self.conditions.pop(index)
+        if 0 <= index < self.get_length():
+            self.attr_idx = np.delete(self.attr_idx, index)
+            self.op_code = np.delete(self.op_code, index)
+            self.value_num = np.delete(self.value_num, index)
+            self.value_obj = np.delete(self.value_obj, index)
+            # The cached bitsets stay valid once the removed condition's row is dropped
+            for key, (X, idx, bits) in self._cond_masks_cache.items():
+                self._cond_masks_cache[key] = (X, idx, np.delete(bits, index, axis=0))
+
+    def _value(self, index):
+        return self.value_obj[index] if self.op_code[index] == EQUAL else self.value_num[index]
 
     def covers(self, instance):
         """ Checks if the rule covers (applies to) the given instance. """
-        for condition in self.conditions:
-            if not condition.satisfies(instance):
+        for index, op, value_num, value_obj in zip(self.attr_idx.tolist(), self.op_code.tolist(),
+                                                   self.value_num.tolist(), self.value_obj):
+            val = instance.getAttribute(index).getValue()
+            if not _OP[op](val, value_obj if op == EQUAL else value_num):
                 return False
         return True
 
+    def covers_mask(self, X, idx=None):
+        """
+        Returns a boolean mask marking which of the instances X[idx] (all rows of X if idx is None)
+        the rule covers.
+        """
+        size = X.shape[0] if idx is None else len(idx)
+        mask = np.ones(size, dtype=bool)
+        for j in range(self.get_length()):
+            column = X[:, self.attr_idx[j]] if idx is None else X[idx, self.attr_idx[j]]
+            mask &= _OP[self.op_code[j]](column, self._value(j))
+        return mask
+
+    def condition_masks(self, X, idx):
+        """
+        Returns a (rule length, len(idx)) boolean matrix whose row j marks the instances X[idx]
+        satisfying condition j.
+        """
+        masks = np.empty((self.get_length(), len(idx)), dtype=bool)
+        for j in range(self.get_length()):
+            masks[j] = _OP[self.op_code[j]](X[idx, self.attr_idx[j]], self._value(j))
+        return masks
+
+    def condition_bits(self, X, idx):
+        """
+        Returns condition_masks(X, idx) packed into a (rule length, ceil(len(idx) / 64)) uint64 bitset matrix.
+        The result is cached until a condition is added or clear_cache is called.
+        """
+        key = (id(X), id(idx))
+        if key in self._cond_masks_cache:
+            return self._cond_masks_cache[key][2]
+        bits = pack_bits(self.condition_masks(X, idx))
+        self._cond_masks_cache[key] = (X, idx, bits)
+        return bits
+
+    def clear_cache(self):
+        """ Drops the cached condition bitsets. """
+        self._cond_masks_cache.clear()
+
     def get_length(self):
-        return len(self.conditions)
-    
+        return len(self.attr_idx)
+
     def copy(self):
         """ Creates a copy of the rule. """
         new_rule = Rule(self.class_label)
-        new_rule.conditions = self.conditions[:] 
+        new_rule.attr_idx = self.attr_idx.copy()
+        new_rule.op_code = self.op_code.copy()
+        new_rule.value_num = self.value_num.copy()
+        new_rule.value_obj = self.value_obj.copy()
         return new_rule
 
+    def to_record(self):
+        """ Packs the rule into a tuple of plain values and bytes for saving. """
+        return (self.class_label, self.attr_idx.tobytes(), self.op_code.tobytes(), self.value_num.tobytes(),
+                self.value_obj.tolist())
+
+    @staticmethod
+    def from_record(record):
+        """ Rebuilds a rule from a tuple created by to_record. """
+        class_label, attr_idx, op_code, value_num, value_obj = record
+        rule = Rule(class_label)
+        rule.attr_idx = np.frombuffer(attr_idx, dtype=np.int32).copy()
+        rule.op_code = np.frombuffer(op_code, dtype=np.int8).copy()
+        rule.value_num = np.frombuffer(value_num, dtype=np.float64).copy()
+        rule.value_obj = np.empty(len(value_obj), dtype=object)
+        rule.value_obj[:] = value_obj
+        return rule
+
     def __str__(self):
         condition_str = " AND ".join([str(c) for c in self.conditions])
         return f"IF {condition_str} THEN {self.class_label}"
-    
+
     def __repr__(self):
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
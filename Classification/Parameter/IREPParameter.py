@@ -6,19 +6,26 @@ class IREPParameter(Parameter):
     It manages settings like pruning ratio and minimum coverage.
     """
 
-    def __init__(self, seed: int = None, pruning_ratio: float = 0.66, min_coverage: int = 1):
+    def __init__(self, seed: int = None, pruning_ratio: float = 0.66, min_coverage: int = 1,
+                 parallel_classes: bool = False):
         """
         Constructor for IREP parameters.
         :param seed: Random seed for reproducible results.
         :param pruning_ratio: Percentage of data used for growing rules (default 0.66).
         :param min_coverage: Minimum number of instances a rule must cover to be valid.
+        :param parallel_classes: Learn the rules of each class in a separate process. Each class then sees
+        all training instances instead of only those left uncovered by the rules of rarer classes.
         """
         super().__init__(seed)
         self.pruning_ratio = pruning_ratio
         self.min_coverage = min_coverage
+        self.parallel_classes = parallel_classes
 
     def getPruningRatio(self) -> float:
         return self.pruning_ratio
         
     def getMinCoverage(self) -> int:
-        return self.min_coverage
\ No newline at end of file
+        return self.min_coverage
+
+    def getParallelClasses(self) -> bool:
+        return self.parallel_classes
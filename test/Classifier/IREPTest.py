@@ -4,6 +4,7 @@ import random
 import numpy as np
 
 from Classification.Parameter.IREPParameter import IREPParameter
+from Classification.IREP import IREPModel as IREPModule
 from Classification.IREP.IREPModel import IREPModel
 from test.Classifier.ClassifierTest import ClassifierTest
 from Classification.Attribute.AttributeType import AttributeType
@@ -101,9 +102,36 @@ class IREPTest(ClassifierTest):
         print(">> TicTac Status : PASSED [OK]")
         print("="*40)
 
+    def test_ParallelClasses(self):
+        print("\n--- IREPModel Parallel Classes Test ---")
+        # Each class is learned in its own process from the full training set
+        irep = IREPModel()
+        irep.train(self.dermatology.getInstanceList(), IREPParameter(parallel_classes=True))
+        error = 100 * irep.test(self.dermatology.getInstanceList()).getErrorRate()
+        print(f"Dermatology Error: %{error:.2f}")
+        self.assertAlmostEqual(5.46, error, 2)
+
+    def test_ParallelAttributes(self):
+        print("\n--- IREPModel Parallel Attributes Test ---")
+        # No bundled dataset is large enough for the threaded attribute search, so the threshold is lowered
+        min_cells = IREPModule._PARALLEL_MIN_CELLS
+        IREPModule._PARALLEL_MIN_CELLS = 1
+        try:
+            irep = IREPModel()
+            irep.train(self.iris.getInstanceList())
+            error = 100 * irep.test(self.iris.getInstanceList()).getErrorRate()
+            self.assertAlmostEqual(2.00, error, 2)
+            # Forked class processes must not reuse the thread pool created above
+            random.seed(42)
+            irep.train(self.dermatology.getInstanceList(), IREPParameter(parallel_classes=True))
+            error = 100 * irep.test(self.dermatology.getInstanceList()).getErrorRate()
+            self.assertAlmostEqual(5.46, error, 2)
+        finally:
+            IREPModule._PARALLEL_MIN_CELLS = min_cells
+
     def test_Load(self):
         print("\n--- IREPModel Save/Load Test ---")
-        filename = "models/irep-iris-test.txt"
+        filename = "models/irep-iris-test.bin"
         
         # Train and save the model
         model_original = IREPModel()
@@ -120,5 +148,21 @@ class IREPTest(ClassifierTest):
         self.assertEqual(error_original, error_loaded, "Model load failed: Results do not match!")
         print("Save/Load Test Passed: OK")
 
+    def test_LoadTextModel(self):
+        print("\n--- IREPModel Text Model Load Test ---")
+        # Models saved before the binary format are one "IF ... THEN ..." rule per line
+        model = IREPModel()
+        model.loadModel("models/irep-iris.txt")
+        self.assertEqual("Iris-virginica", model.default_class)
+        self.assertEqual(["IF Att-2 <= 1.9 THEN Iris-setosa",
+                          "IF Att-3 <= 1.6 AND Att-2 <= 4.9 THEN Iris-versicolor"], [str(rule) for rule in model.rules])
+        error = 100 * model.test(self.iris.getInstanceList()).getErrorRate()
+        self.assertAlmostEqual(2.00, error, 2)
+
+        # A malformed line fails the whole load instead of keeping the rules read before it
+        model.loadModel("models/irep-iris-malformed.txt")
+        self.assertEqual([], model.rules)
+        self.assertIsNone(model.default_class)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file